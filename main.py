@@ -1,18 +1,41 @@
 # main.py
 from fastmcp import FastMCP
 import notmuch2
+import inspect
+import io
 import re
-from email import message_from_file
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email import policy
+from email.errors import HeaderParseError
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser, BytesParser
+from functools import lru_cache, partial, wraps
+from itertools import islice
 from string import Template
+from typing import TextIO
 from pathlib import Path
 
+try:
+    import fast_mail_parser
+except ImportError:
+    fast_mail_parser = None
+
 # Prompt loading functionality
 PROMPTS_DIR = Path(__file__).parent / "prompts"
 
+@lru_cache(maxsize=None)
 def load_prompt_template(filename: str) -> Template:
     """
     Load a prompt template from the prompts directory with error handling.
 
+    The prompt files are static, so each template is read once and then
+    served from memory.
+
     Args:
         filename: The name of the prompt file
 
@@ -26,12 +49,11 @@ def load_prompt_template(filename: str) -> Template:
     """
     prompt_file = PROMPTS_DIR / filename
 
-    if not prompt_file.exists():
-        raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
-
     try:
         content = prompt_file.read_text(encoding='utf-8')
         return Template(content)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
     except PermissionError:
         raise PermissionError(f"Permission denied reading prompt file: {prompt_file}")
     except Exception as e:
@@ -40,6 +62,153 @@ def load_prompt_template(filename: str) -> Template:
 # Create an MCP server instance
 mcp = FastMCP("Notmuch Server")
 
+# Database handling functionality
+_DB = None
+_DB_OPENED = 0.0
+_DB_LOCK = threading.Lock()
+
+def _close_db():
+    """Close the shared database handle, if any. Must be called with _DB_LOCK held."""
+    global _DB
+    if _DB is not None:
+        try:
+            _DB.close()
+        except notmuch2.NotmuchError:
+            pass
+        _DB = None
+
+def _get_db() -> notmuch2.Database:
+    """
+    Return the shared read-only database handle, opening it if needed.
+
+    The handle is reopened once it is older than CACHE_TTL so that newly
+    indexed mail becomes visible. Must be called with _DB_LOCK held.
+    """
+    global _DB, _DB_OPENED
+    now = time.monotonic()
+    if _DB is not None and now - _DB_OPENED >= CACHE_TTL:
+        _close_db()
+    if _DB is None:
+        _DB = notmuch2.Database(mode=notmuch2.Database.MODE.READ_ONLY)
+        _DB_OPENED = now
+    return _DB
+
+@contextmanager
+def open_db():
+    """
+    Provide exclusive access to the shared read-only notmuch database.
+
+    libnotmuch handles are not thread-safe, so the lock is held for the whole
+    block. On a notmuch error the handle is dropped and reopened on next use,
+    see query_db() to retry the operation.
+
+    Yields:
+        notmuch2.Database: The open notmuch database
+    """
+    with _DB_LOCK:
+        try:
+            yield _get_db()
+        except notmuch2.NotmuchError:
+            _close_db()
+            raise
+
+def query_db(operation):
+    """
+    Run operation on the shared database, retrying once on a fresh handle.
+
+    A long lived read-only handle fails with a notmuch error, such as
+    DatabaseModifiedError, once a reindex (notmuch new, lei up) commits.
+    open_db() drops the handle on error, so the retry reopens the database.
+
+    Args:
+        operation: Callable taking the open notmuch2.Database
+
+    Returns:
+        The value returned by operation
+    """
+    try:
+        with open_db() as db:
+            return operation(db)
+    except notmuch2.NotmuchError:
+        with open_db() as db:
+            return operation(db)
+
+def reset_db():
+    """Close the shared database handle so the next access reopens it."""
+    with _DB_LOCK:
+        _close_db()
+
+# Result caching functionality
+CACHE_MAXSIZE = 256
+CACHE_TTL = 60  # seconds
+
+_caches = []
+
+def ttl_cache(maxsize: int = CACHE_MAXSIZE, ttl: float = CACHE_TTL):
+    """
+    Memoize a function on its arguments, expiring entries after ttl seconds.
+
+    The notmuch database changes as new mail is indexed, so results are only
+    reused for a short time. Arguments are bound to the function signature
+    with defaults applied, so positional, keyword and defaulted calls share
+    the same entry. Exceptions are never cached.
+
+    Entries are kept in the order they were stored: expired ones are dropped
+    from the front on every call, so large results do not outlive their ttl.
+
+    Args:
+        maxsize: Maximum number of entries kept, oldest first out
+        ttl: Number of seconds an entry stays valid
+
+    Returns:
+        A decorator adding a cache_clear() method to the wrapped function
+    """
+    def decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()
+        signature = inspect.signature(func)
+
+        def expire(now):
+            # Must be called with lock held
+            while cache:
+                stamp, _ = next(iter(cache.values()))
+                if now - stamp < ttl:
+                    break
+                cache.popitem(last=False)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = bound.args + tuple(sorted(bound.kwargs.items()))
+
+            with lock:
+                expire(time.monotonic())
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[1]
+
+            value = func(*bound.args, **bound.kwargs)
+
+            with lock:
+                now = time.monotonic()
+                expire(now)
+                # Re-insert at the end to keep the entries in timestamp order
+                cache.pop(key, None)
+                cache[key] = (now, value)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        _caches.append(wrapper)
+        return wrapper
+    return decorator
+
 def get_header(message: notmuch2.Message, header_name: str) -> str:
     """Safely get a header from a notmuch message, returning empty string if not found."""
     try:
@@ -47,171 +216,461 @@ def get_header(message: notmuch2.Message, header_name: str) -> str:
     except LookupError:
         return ''
 
-def is_patch(message: notmuch2.Message, toplevel_message_id: str) -> bool:
+# Subject pattern used to recognize the patches of a series: either a reply
+# prefix (Re:, R:, etc.) or a PATCH tag within square brackets at the start.
+# It is matched against the upper cased subject, avoiding re.IGNORECASE.
+_SUBJECT_RE = re.compile(r'^\s*(?:(?P<reply>(?:RE?|AW|FWD?):)|\[.*?PATCH.*?\])')
+
+def is_patch(message: notmuch2.Message, toplevel_message_ids: set[str]) -> bool:
     """
     Check if a message is a patch based on:
-    1. Its In-Reply-To header equals the toplevel message ID
-    2. Its subject contains a PATCH tag (e.g., [PATCH], [RFC PATCH v2], etc.)
+    1. Its subject contains a PATCH tag (e.g., [PATCH], [RFC PATCH v2], etc.)
+    2. Its In-Reply-To header equals one of the toplevel message IDs
+
+    The subject is checked first: notmuch serves it from its database, while
+    In-Reply-To requires libnotmuch to open and parse the message file.
 
     Args:
         message: The notmuch message to check
-        toplevel_message_id: The Message-ID of the toplevel/cover letter message
+        toplevel_message_ids: The Message-IDs of the toplevel/cover letter messages
 
     Returns:
         bool: True if the message is a patch, False otherwise
     """
     try:
-        # Check if In-Reply-To matches the toplevel message ID
-        in_reply_to = get_header(message, 'in-reply-to')
-        in_reply_to = in_reply_to.strip().strip('<>')
-
-        if in_reply_to != toplevel_message_id:
+        # Check if subject contains PATCH tag, a plain substring test
+        # rejects most subjects before running the regex
+        subject = get_header(message, 'subject').upper()
+        if 'PATCH' not in subject:
             return False
 
-        # Check if subject contains PATCH tag
-        subject = get_header(message, 'subject')
+        # A single match tells replies (starts with Re:, R:, etc.) from
+        # subjects with PATCH within square brackets at the start
+        match = _SUBJECT_RE.match(subject)
+        if match is None or match.group('reply') is not None:
+            return False
 
-        # Check if it's a reply (starts with Re:, R:, etc.)
-        is_reply = bool(re.match(r'^\s*(re?|aw|fwd?):', subject, re.IGNORECASE))
-        if is_reply:
+        # Check if In-Reply-To matches a toplevel message ID, a message
+        # without the header cannot be a patch of the series
+        try:
+            in_reply_to = message.header('in-reply-to')
+        except LookupError:
             return False
 
-        # Look for PATCH within square brackets at the start, case insensitive
-        patch_pattern = r'^\s*\[.*?PATCH.*?\]'
-        is_patch = bool(re.search(patch_pattern, subject, re.IGNORECASE))
-        return is_patch
+        return in_reply_to.strip().strip('<>') in toplevel_message_ids
 
     except Exception:
         return False
 
-def walk_replies(message, filter_func=None):
+def retrieve_thread(db: notmuch2.Database, thread_id: str, all_messages=True) -> Iterator[notmuch2.Message]:
     """
-    Walk through message replies, optionally filtering them.
+    Retrieve messages in a thread given its thread ID.
 
     Args:
-        message: The message whose replies to walk
-        filter_func: Optional filter function that takes (reply_message, original_message)
-                    and returns True if the reply should be included
+        db (notmuch2.Database): The open notmuch database
+        thread_id (str): The thread ID to retrieve messages from
+        all_messages (bool): If True, returns all messages. If False, returns only
+                           cover letter and patches.
 
-    Returns:
-        list: List of filtered reply messages
+    Yields:
+        notmuch2.Message: The Message objects in the thread, oldest first
+
+    Raises:
+        LookupError: If the thread does not exist
+        notmuch2.NotmuchError: If database access fails
+    """
+    # Search for the specific thread
+    threads = db.threads("thread:" + thread_id)
+
+    # Get the first (and should be only) thread
+    thread = next(iter(threads), None)
+    if thread is None:
+        raise LookupError(f"Thread with ID {thread_id} not found")
+
+    # A flat pass over the thread yields every message without walking
+    # the reply tree one message at a time
+    if all_messages:
+        yield from thread
+        return
+
+    # Always include the toplevel/cover letter messages, and the patches
+    # replying to one of them
+    toplevel_message_ids = {message.messageid for message in thread.toplevel()}
+    for message in thread:
+        if message.messageid in toplevel_message_ids or is_patch(message, toplevel_message_ids):
+            yield message
+
+def decode_part(part) -> str:
+    """Decode the payload of a non-multipart email part to a string."""
+    payload = part.get_payload(decode=True)
+    try:
+        return payload.decode(part.get_content_charset() or "utf-8", errors="replace")
+    except LookupError:
+        # Unknown charset
+        return payload.decode("utf-8", errors="replace")
+
+def get_email_body(msg) -> str:
     """
-    messages = []
-    for reply in message.replies():
-        # If no filter function is provided, include all messages (original behavior)
-        if filter_func is None or filter_func(reply, message):
-            messages.append(reply)
+    Extract the body from an email.message.EmailMessage object.
+    Handles plain text and multipart messages.
 
-        # Recursively walk replies regardless of whether current message was included
-        messages.extend(walk_replies(reply, filter_func))
+    The first text/plain part that is not an attachment is located with
+    get_body(), and only that part is decoded, defaulting to UTF-8.
+    """
+    body_part = msg.get_body(preferencelist=('plain',))
+    if body_part is not None:
+        return decode_part(body_part)
 
-    return messages
+    # If no text/plain part found, fallback to first part's payload
+    first_part = next((part for part in msg.walk() if not part.is_multipart()), None)
+    return decode_part(first_part) if first_part is not None else ""
 
-def retrieve_thread(db: notmuch2.Database, thread_id: str, all_messages=True) -> list[notmuch2.Message]:
+def split_message(raw: bytes) -> tuple[bytes, bytes]:
     """
-    Retrieve messages in a thread given its thread ID.
+    Split the raw bytes of an email into its header block and its body.
 
     Args:
-        db (notmuch2.Database): The open notmuch database
-        thread_id (str): The thread ID to retrieve messages from
-        all_messages (bool): If True, returns all messages. If False, returns only
-                           cover letter and patches.
+        raw: The raw message bytes
 
     Returns:
-        list[notmuch2.Message]: A list of Message objects in the thread
+        tuple[bytes, bytes]: The header block and the body
     """
-    messages = []
-
+    # The header block ends at the first empty line
+    end = raw.find(b'\n\n')
+    crlf_end = raw.find(b'\n\r\n')
+    if crlf_end != -1 and (end == -1 or crlf_end < end):
+        return raw[:crlf_end + 1], raw[crlf_end + 3:]
+    if end != -1:
+        return raw[:end + 1], raw[end + 2:]
+    return raw, b''
+
+def decode_header_value(value: str) -> str:
+    """Decode RFC 2047 encoded words in a header value, keeping it as is on failure."""
     try:
-        # Search for the specific thread
-        threads = db.threads(f"thread:{thread_id}")
-
-        # Get the first (and should be only) thread
-        thread = next(iter(threads), None)
-
-        if thread:
-            # Get toplevel messages in the thread
-            for toplevel_message in thread.toplevel():
-                # Always include the toplevel/cover letter message
-                messages.append(toplevel_message)
-
-                # Define filter function based on all_messages parameter
-                if all_messages:
-                    filter_func = None  # Include all replies
-                else:
-                    # Create a filter function that identifies patches
-                    def patch_filter(reply_message, original_message):
-                        return is_patch(reply_message, toplevel_message.messageid)
-                    filter_func = patch_filter
-
-                # Get replies using the appropriate filter
-                messages.extend(walk_replies(toplevel_message, filter_func))
+        return str(make_header(decode_header(value)))
+    except (HeaderParseError, LookupError, UnicodeError):
+        return value
+
+def scan_headers(header_block: bytes, wanted: tuple[bytes, ...],
+                 header_cache: dict | None = None) -> dict[bytes, str]:
+    """
+    Extract some headers from a raw header block without an email parser.
+
+    Folded values are unfolded to a single line, and only the first occurrence
+    of each header is kept. Encoded words are decoded on the matched values only.
+
+    Args:
+        header_block: The raw header block of a message
+        wanted: The lower case names of the headers to extract
+        header_cache: Optional dict mapping raw values to their decoded string,
+                      shared across the messages of a thread so that recurring
+                      values are decoded once and stored once
+
+    Returns:
+        dict[bytes, str]: The decoded values keyed by lower case header name
+    """
+    found = {}
+    current = None
+    for line in header_block.splitlines():
+        # Continuation lines start with whitespace
+        if line[:1] in (b' ', b'\t'):
+            if current is not None:
+                current.append(line.lstrip())
+            continue
+
+        name, sep, value = line.partition(b':')
+        name = name.strip().lower()
+        if sep and name in wanted and name not in found:
+            current = found[name] = [value]
         else:
-            print(f"Thread with ID {thread_id} not found")
+            current = None
+
+    headers = {}
+    for name, parts in found.items():
+        raw = b' '.join(parts)
+        value = header_cache.get(raw) if header_cache is not None else None
+        if value is None:
+            value = decode_header_value(raw.decode('utf-8', errors='replace').strip())
+            if header_cache is not None:
+                value = header_cache.setdefault(raw, value)
+        headers[name] = value
+    return headers
+
+# Headers shown for each message, in display order. The headers notmuch
+# indexes are read from the database, the others from the message file.
+NOTMUCH_HEADERS = (
+    ('From', 'from'),
+    ('Subject', 'subject'),
+)
+FILE_HEADERS = (
+    ('In-Reply-To', b'in-reply-to'),
+    ('To', b'to'),
+    ('Cc', b'cc'),
+    ('Date', b'date'),
+)
+_SCANNED_HEADERS = tuple(name for _, name in FILE_HEADERS) + (
+    b'content-type',
+    b'content-transfer-encoding',
+)
+
+def file_header_fields(headers: dict[bytes, str]) -> dict[str, str]:
+    """Map headers found by scan_headers() to the FILE_HEADERS display labels."""
+    fields = {label: headers.get(name, '') for label, name in FILE_HEADERS}
+    fields['In-Reply-To'] = fields['In-Reply-To'].strip('<>')
+    return fields
+
+def read_message_headers(path: Path, header_cache: dict | None = None) -> tuple[dict[str, str], None]:
+    """
+    Read only the header block of the email stored at path.
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return []
+    The file is read line by line up to the end of the header block, so the
+    body is never loaded.
 
-    return messages
+    Args:
+        path: The path of the message file
+        header_cache: Optional dict of already decoded values, see scan_headers()
 
-def get_email_body(msg) -> str:
+    Returns:
+        tuple[dict[str, str], None]: The header values keyed by display label,
+                                     and None in place of the body
     """
-    Extract the body from an email.message.Message object.
-    Handles plain text and multipart messages.
+    lines = []
+    with path.open('rb') as f:
+        for line in f:
+            if line in (b'\n', b'\r\n'):
+                break
+            lines.append(line)
+
+    headers = scan_headers(b''.join(lines), _SCANNED_HEADERS, header_cache)
+    return file_header_fields(headers), None
+
+def parse_content_type(value: str) -> tuple[str, str | None]:
     """
-    if msg.is_multipart():
-        # Walk through the parts and find the first text/plain part
-        for part in msg.walk():
-            content_type = part.get_content_type()
-            content_disposition = part.get("Content-Disposition", "")
-            if content_type == "text/plain" and "attachment" not in content_disposition:
-                charset = part.get_content_charset() or "utf-8"
-                return part.get_payload(decode=True).decode(charset, errors="replace")
-        # If no text/plain part found, fallback to first part's payload
-        first_part = msg.get_payload(0)
-        charset = first_part.get_content_charset() or "utf-8"
-        return first_part.get_payload(decode=True).decode(charset, errors="replace")
-    else:
-        # Not multipart - just decode the payload
-        charset = msg.get_content_charset() or "utf-8"
-        return msg.get_payload(decode=True).decode(charset, errors="replace")
+    Parse a Content-Type header value into its lower case type and its charset.
 
+    Args:
+        value: The Content-Type header value, possibly empty
 
-def get_message_info(message: notmuch2.Message) -> str:
+    Returns:
+        tuple[str, str | None]: The content type, text/plain when not set, and
+                                the charset parameter if any
+    """
+    content_type, *params = value.split(';')
+    charset = None
+    for param in params:
+        key, sep, param_value = param.partition('=')
+        if sep and key.strip().lower() == 'charset':
+            charset = param_value.strip().strip('"\'') or None
+    return content_type.strip().lower() or 'text/plain', charset
+
+# Transfer encodings leaving the body bytes untouched, the default being 7bit
+_IDENTITY_ENCODINGS = ('', '7bit', '8bit')
+
+def extract_body(raw: bytes, body: bytes, headers: dict[bytes, str]) -> str:
     """
-    Helper function to format basic information about a message as a string.
+    Extract the body of an email from its raw bytes.
+
+    Patches sent with git send-email are single part text/plain messages
+    without transfer encoding: their body bytes are decoded directly. For
+    other messages, when the optional fast_mail_parser package is installed,
+    its compiled parser decodes the first text/plain part in a single call.
+    Otherwise, or if it finds no text/plain part, the email module is used:
+    single part messages are decoded straight from the unparsed payload, and
+    the full MIME tree is built only for multipart ones.
 
     Args:
-        message (notmuch2.Message): The message object to format info for
+        raw: The raw message bytes
+        body: The raw body, as split by split_message()
+        headers: The message headers found by scan_headers(), including
+                 Content-Type and Content-Transfer-Encoding
 
     Returns:
-        str: Formatted string containing message information
+        str: The decoded email body, with LF line endings
     """
-    result = []
-    result.append(f"Message ID: {message.messageid}")
+    content_type, charset = parse_content_type(headers.get(b'content-type', ''))
+    encoding = headers.get(b'content-transfer-encoding', '').strip().lower()
+    text = None
+    if content_type == 'text/plain' and encoding in _IDENTITY_ENCODINGS:
+        try:
+            text = body.decode(charset or 'utf-8', errors='replace')
+        except LookupError:
+            # Unknown charset, fall back to the generic path below
+            pass
+
+    if text is None and fast_mail_parser is not None:
+        try:
+            text_plain = fast_mail_parser.parse_email(raw).text_plain
+        except fast_mail_parser.ParseError:
+            text_plain = None
+        if text_plain:
+            text = text_plain[0]
+
+    if text is None:
+        if content_type.startswith("multipart/"):
+            email_msg = BytesParser(policy=policy.default).parsebytes(raw)
+        else:
+            email_msg = BytesHeaderParser(policy=policy.default).parsebytes(raw)
+        text = get_email_body(email_msg)
+
+    # Message files are read as bytes, so undo CRLF line endings here as
+    # text mode reading used to
+    return text.replace('\r\n', '\n')
+
+def read_message_file(path: Path, header_cache: dict | None = None) -> tuple[dict[str, str], str]:
+    """
+    Read the email stored at path and extract its file only headers and body.
+
+    The headers notmuch does not index are scanned from the raw header block,
+    so libnotmuch does not have to open and parse the file a second time.
+    The body is then decoded by extract_body().
+
+    Args:
+        path: The path of the message file
+        header_cache: Optional dict of already decoded values, see scan_headers()
+
+    Returns:
+        tuple[dict[str, str], str]: The header values keyed by display label,
+                                    and the decoded email body
+    """
+    raw = path.read_bytes()
+    header_block, body = split_message(raw)
+    headers = scan_headers(header_block, _SCANNED_HEADERS, header_cache)
+
+    return file_header_fields(headers), extract_body(raw, body, headers)
+
+def read_message_fields(message: notmuch2.Message, header_cache: dict | None = None) -> dict[str, str]:
+    """
+    Read the displayed metadata that notmuch indexes for a message.
+
+    Only the notmuch database is queried: the message file is not opened
+    here, see read_message_file() for the remaining headers.
+
+    Args:
+        message (notmuch2.Message): The message object to read fields from
+        header_cache (dict | None): Optional dict of already formatted values,
+                                    used to share the tags string of messages
+                                    carrying the same tags
+
+    Returns:
+        dict[str, str]: The field values keyed by their display label
+    """
+    fields = {'Message ID': message.messageid}
 
     # Get headers directly from notmuch message, handle missing headers gracefully
-    result.append(f"In-Reply-To: {get_header(message, 'in-reply-to').strip().strip('<>')}")
-    result.append(f"From: {get_header(message, 'from')}")
-    result.append(f"To: {get_header(message, 'to')}")
-    result.append(f"Cc: {get_header(message, 'cc')}")
-    result.append(f"Subject: {get_header(message, 'subject')}")
-    result.append(f"Date: {get_header(message, 'date')}")
-    result.append(f"Tags: {', '.join(message.tags)}")
+    for label, name in NOTMUCH_HEADERS:
+        fields[label] = get_header(message, name)
+
+    tags = tuple(message.tags)
+    tags_joined = header_cache.get(tags) if header_cache is not None else None
+    if tags_joined is None:
+        tags_joined = ', '.join(tags)
+        if header_cache is not None:
+            header_cache[tags] = tags_joined
+    fields['Tags'] = tags_joined
+    return fields
+
+# Line closing each formatted message
+MESSAGE_SEPARATOR = "-" * 50
+
+def write_message_info(out: TextIO, fields: dict[str, str], body: str | None = None) -> None:
+    """
+    Helper function to write basic information about a message to a text stream.
+
+    The body is written to the stream as is, rather than copied into a
+    per-message string first.
 
-    # Get body from file
-    with message.path.open() as f:
-        email_msg = message_from_file(f)
+    Args:
+        out (TextIO): The stream to write to
+        fields (dict[str, str]): The message metadata, as read by read_message_fields()
+                                 and read_message_file()
+        body (str | None): The message body, as read by read_message_file(),
+                           or None to write the headers only
+    """
+    out.write(f"Message ID: {fields['Message ID']}\n"
+              f"In-Reply-To: {fields['In-Reply-To']}\n"
+              f"From: {fields['From']}\n"
+              f"To: {fields['To']}\n"
+              f"Cc: {fields['Cc']}\n"
+              f"Subject: {fields['Subject']}\n"
+              f"Date: {fields['Date']}\n"
+              f"Tags: {fields['Tags']}\n")
+    if body is not None:
+        out.write("Body:\n")
+        out.write(body)
+        out.write("\n")
+    out.write(MESSAGE_SEPARATOR)
+
+# Maximum number of threads reading and parsing message files concurrently
+BODY_WORKERS = 16
+
+def read_message_files(read_file, paths: list[Path]) -> Iterator:
+    """
+    Read message files concurrently, yielding the results in the order of paths.
+
+    The thread pool is sized to the number of files, up to BODY_WORKERS, and
+    not started at all for a single file.
+
+    Args:
+        read_file: The function reading one message file, such as read_message_file()
+        paths: The paths of the message files
+
+    Yields:
+        The result of read_file for each path
+    """
+    workers = min(BODY_WORKERS, len(paths))
+    if workers <= 1:
+        yield from map(read_file, paths)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(read_file, paths)
+
+@ttl_cache()
+def format_thread(tid: str, all_messages=True, with_body=True) -> str:
+    """
+    Format thread messages with optional filtering, caching the result.
 
-    body = get_email_body(email_msg)
-    result.append("Body:")
-    result.append(body)
-    result.append("-" * 50)
+    The metadata indexed by notmuch is read first for every message. Message
+    files are then read and parsed by a thread pool, outside of the database
+    lock, since libnotmuch handles must not be shared across threads.
 
-    return '\n'.join(result)
+    Args:
+        tid (str): Thread ID to format
+        all_messages (bool): If True, formats all messages. If False, formats only
+                           cover letter and patches.
+        with_body (bool): If False, formats the headers only and never reads
+                        message bodies.
+
+    Returns:
+        str: Formatted thread content
 
-def do_show_thread(tid: str, all_messages=True) -> str:
+    Raises:
+        LookupError: If the thread does not exist
+        notmuch2.NotmuchError: If database access fails
+        OSError: If a message file cannot be read
+    """
+    # Values recurring across the thread (senders, lists, tags) are decoded once
+    header_cache = {}
+
+    # Hold the shared notmuch database only while querying it
+    messages = query_db(lambda db: [(read_message_fields(msg, header_cache), msg.path)
+                                    for msg in retrieve_thread(db, tid, all_messages)])
+
+    # Get remaining headers and bodies from files, keeping the thread order
+    read_file = read_message_file if with_body else read_message_headers
+    contents = read_message_files(partial(read_file, header_cache=header_cache),
+                                  [path for _, path in messages])
+
+    # Write each message as soon as it is read, so that its body can be
+    # released right after
+    out = io.StringIO()
+    for index, ((file_fields, body), (fields, _)) in enumerate(zip(contents, messages)):
+        if index:
+            out.write('\n')
+        write_message_info(out, fields | file_fields, body)
+    return out.getvalue()
+
+def do_show_thread(tid: str, all_messages=True, with_body=True) -> str:
     """
     Show thread messages with optional filtering.
 
@@ -219,23 +678,20 @@ def do_show_thread(tid: str, all_messages=True) -> str:
         tid (str): Thread ID to show
         all_messages (bool): If True, shows all messages. If False, shows only
                            cover letter and patches.
+        with_body (bool): If False, shows the message headers only.
 
     Returns:
         str: Formatted thread content
-    """
-    result = []
 
+    Raises:
+        LookupError: If the thread does not exist
+        RuntimeError: If database access fails
+        OSError: If a message file cannot be read
+    """
     try:
-        # Open the notmuch database and keep it open while processing
-        with notmuch2.Database(mode=notmuch2.Database.MODE.READ_ONLY) as db:
-            messages = retrieve_thread(db, tid, all_messages)
-            for msg in messages:
-                result.append(get_message_info(msg))
-    except Exception as e:
-        print(f"Error: {e}")
-        return f"Error: {e}"
-
-    return '\n'.join(result)
+        return format_thread(tid, all_messages, with_body)
+    except notmuch2.NotmuchError as e:
+        raise RuntimeError(f"Notmuch database error: {e}")
 
 @mcp.tool()
 def show_thread(thread_id: str) -> str:
@@ -246,13 +702,31 @@ def show_thread(thread_id: str) -> str:
         thread_id: The ID of the thread to display (without the prefix "thread:").
 
     Returns:
-        A formatted string containing the messages in the thread,
-        or an error message.
+        A formatted string containing the messages in the thread.
+        An error is raised if the thread does not exist or cannot be read.
     """
     return do_show_thread(thread_id)
 
 @mcp.tool()
-def show_series(thread_id: str) -> str:
+def show_thread_summary(thread_id: str) -> str:
+    """
+    Displays the headers of every message in a thread given its ID, without
+    the message bodies.
+
+    Use it to get an overview of a thread (who replied to what, and when)
+    before calling show_thread() only when the message contents are needed.
+
+    Args:
+        thread_id: The ID of the thread to display (without the prefix "thread:").
+
+    Returns:
+        A formatted string containing the headers of the messages in the thread.
+        An error is raised if the thread does not exist or cannot be read.
+    """
+    return do_show_thread(thread_id, with_body=False)
+
+@mcp.tool()
+def show_series(thread_id: str, headers_only: bool = False) -> str:
     """
     Displays only the cover letter and patch messages from a thread,
     filtering out replies and other non-patch messages.
@@ -263,85 +737,161 @@ def show_series(thread_id: str) -> str:
 
     Args:
         thread_id: The ID of the thread to display (without the prefix "thread:").
+        headers_only: If True, omits the message bodies, which is enough to
+                      list the patches of the series without reading them.
 
     Returns:
         A formatted string containing only the cover letter and patch messages
-        from the thread, or an error message.
+        from the thread. An error is raised if the thread does not exist
+        or cannot be read.
     """
-    return do_show_thread(thread_id, all_messages=False)
+    return do_show_thread(thread_id, all_messages=False, with_body=not headers_only)
+
+# Query term restricting matches to patch messages. The wildcard keeps
+# subjects such as "[PATCHv2 net]", whose first term is "patchv2".
+SERIES_QUERY = "subject:PATCH*"
+
+# Reply prefix pattern used to recognize series threads, matched against the
+# upper cased subject
+_SERIES_REPLY_RE = re.compile(r'^\s*(?:RE?|AW|FWD?)\s*:')
 
-def do_find_threads(notmuch_filter: str) -> list[tuple[str, str]]:
+def is_series_subject(subject: str) -> bool:
+    """
+    Check whether a subject is the one of a patch, not of a reply or forward.
+
+    Args:
+        subject: The decoded message subject
+
+    Returns:
+        bool: True if the subject contains "PATCH" and has no reply prefix
+    """
+    # Upper case the subject once for both tests
+    subject_upper = subject.upper()
+    return 'PATCH' in subject_upper and not _SERIES_REPLY_RE.match(subject_upper)
+
+def iter_series_threads(db: notmuch2.Database, notmuch_filter: str) -> Iterator[tuple[str, str]]:
+    """
+    Iterate over the patch series threads matching a notmuch filter.
+
+    Args:
+        db (notmuch2.Database): The open notmuch database
+        notmuch_filter: The notmuch query string to filter messages
+
+    Yields:
+        tuple[str, str]: The (thread_id, thread_subject) pair of each patch series,
+        most recently active thread first
+    """
+    # A single thread query returns each matching thread once, so
+    # there is no need to deduplicate or look the thread up again.
+    # Newest first, so that a truncated result keeps the recent series
+    # rather than the oldest ones in index order.
+    threads = db.threads(f"({notmuch_filter}) and {SERIES_QUERY}",
+                         sort=notmuch2.Database.SORT.NEWEST_FIRST)
+
+    for thread in threads:
+        # Classify the thread by its first toplevel message
+        toplevel_message = next(iter(thread.toplevel()), None)
+        if toplevel_message is None:
+            continue
+
+        subject = get_header(toplevel_message, 'subject')
+        if not is_series_subject(subject):
+            continue
+
+        # A matching message only counts when it is itself a patch and no
+        # reply, so that reviews ("Re: [PATCH] ...") matching the filter do
+        # not report the reviewed series. Subjects are served from the
+        # database, so this does not read any message file.
+        if not any(message.matched and is_series_subject(get_header(message, 'subject'))
+                   for message in thread):
+            continue
+
+        yield thread.threadid, thread.subject or subject
+
+# Maximum number of series returned by default by find_threads
+FIND_THREADS_LIMIT = 1000
+
+# Thread id of the last pair returned by find_threads when the limit was hit
+TRUNCATED_THREAD_ID = ""
+
+@ttl_cache()
+def do_find_threads(notmuch_filter: str, limit: int = FIND_THREADS_LIMIT) -> list[tuple[str, str]]:
     """
     Find patch series threads from a notmuch filter.
 
     Args:
         notmuch_filter: The notmuch query string to filter messages
+        limit: The maximum number of series to return
 
     Returns:
-        list[tuple[str, str]]: List of (thread_id, thread_subject) tuples for patch series
+        list[tuple[str, str]]: List of (thread_id, thread_subject) tuples for patch series,
+        newest first. If more than limit series match, the first limit ones are
+        followed by a (TRUNCATED_THREAD_ID, notice) pair.
 
     Raises:
-        ValueError: If notmuch_filter is empty or None
+        ValueError: If notmuch_filter is empty or None, or limit is not positive
         RuntimeError: If database access fails
     """
     if not notmuch_filter or not notmuch_filter.strip():
         raise ValueError("notmuch_filter cannot be empty or None")
-
-    series_threads = []
-    seen_threads = set()
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
 
     try:
-        with notmuch2.Database(mode=notmuch2.Database.MODE.READ_ONLY) as db:
-            messages = db.messages(notmuch_filter)
-
-            for message in messages:
-                thread_id = message.threadid
-
-                # Skip if we've already processed this thread
-                if thread_id in seen_threads:
-                    continue
-
-                subject = message.header('subject') or ""
-
-                # Check if this is a patch email (not a reply)
-                is_patch = "PATCH" in subject.upper()
-                is_reply = any(subject.upper().startswith(prefix) for prefix in ["RE:", "R:"])
-
-                if is_patch and not is_reply:
-                    # Get thread subject directly from the thread
-                    thread_query = db.threads(f"thread:{thread_id}")
-                    try:
-                        thread = next(iter(thread_query))
-                        series_threads.append((thread_id, thread.subject or subject))
-                        seen_threads.add(thread_id)
-                    except StopIteration:
-                        # Thread not found, use message subject as fallback
-                        series_threads.append((thread_id, subject))
-                        seen_threads.add(thread_id)
+        # Stop querying notmuch as soon as enough series were found,
+        # fetching one more to tell whether the result is truncated
+        series = query_db(lambda db: list(islice(iter_series_threads(db, notmuch_filter),
+                                                 limit + 1)))
 
     except notmuch2.NotmuchError as e:
         raise RuntimeError(f"Notmuch database error: {e}")
     except Exception as e:
         raise RuntimeError(f"Unexpected error while searching threads: {e}")
 
-    return series_threads
+    if len(series) > limit:
+        series[limit] = (TRUNCATED_THREAD_ID,
+                         f"More than {limit} series match, only the {limit} most "
+                         "recent are listed: narrow notmuch_filter or raise limit")
+    return series
 
 @mcp.tool()
-def find_threads(notmuch_filter: str) -> list[tuple[str, str]]:
+def find_threads(notmuch_filter: str, limit: int = FIND_THREADS_LIMIT) -> list[tuple[str, str]]:
     """
     Finds series using a notmuch filter string and returns a list containing the pair
     (thread id, thread subject) corresponding to each thread matching the filter.
-    notmuch_filter must match only toplevel messages or messages whose subject
-    contains "PATCH" and are no "Re:" "RE:" "R:"
+    A thread is reported when one of its messages matching notmuch_filter and
+    its toplevel message both have a subject containing "PATCH" that is no
+    reply or forward ("Re:" "RE:" "R:" "AW:" "Fw:" "Fwd:")
 
     Args:
         notmuch_filter: The notmuch query to execute.
                        Example: "from:jane@example.com AND tag:unread"
+        limit: The maximum number of threads to return (default: 1000).
+               Narrow the filter rather than raising it for broad queries.
+
+    Returns:
+        list[(str, str)]: A list of thread IDs and subjects for each thread matching the search criteria,
+        most recently active first. When more than limit threads match, the list
+        ends with an extra pair whose thread ID is empty and whose subject says the
+        result was truncated; it is not a thread and must not be passed to other tools.
+    """
+    return do_find_threads(notmuch_filter, limit)
+
+@mcp.tool()
+def clear_cache() -> str:
+    """
+    Drops the cached results of show_thread, show_thread_summary, show_series
+    and find_threads, so that the next calls read fresh data from the notmuch
+    database.
+    Results are otherwise reused for up to a minute.
 
     Returns:
-        list[(str, str)]: A list of thread IDs and subjects for each thread matching the search criteria
+        A confirmation message.
     """
-    return do_find_threads(notmuch_filter)
+    for cached in _caches:
+        cached.cache_clear()
+    reset_db()
+    return "Cache cleared"
 
 @mcp.prompt
 def my_status(notmuch_filter: str) -> str: